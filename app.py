@@ -1,9 +1,50 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import math
-from scipy.stats import linregress
+
+
+@st.cache_data
+def _fit(conc: tuple, absb: tuple):
+    x = np.asarray(conc, dtype=float)
+    y = np.asarray(absb, dtype=float)
+    dx = x - x.mean()
+    dy = y - y.mean()
+    sxy = (dx * dy).sum()
+    sxx = (dx * dx).sum()
+    syy = (dy * dy).sum()
+    a = sxy / sxx
+    b = y.mean() - a * x.mean()
+    r = sxy / np.sqrt(sxx * syy) if syy > 0 else 0.0
+    return float(a), float(b), float(r)
+
+
+def build_calibration_chart(df: pd.DataFrame, a: float, b: float):
+    import altair as alt  # baru diimpor saat data standar valid
+
+    x_max = df["Konsentrasi"].max() * 1.1
+    line = pd.DataFrame({"Konsentrasi": [0.0, x_max], "Absorbansi": [b, a * x_max + b]})  # garis lurus cukup dua titik
+
+    points = alt.Chart(df).mark_circle(color="blue").encode(
+        x=alt.X("Konsentrasi", title="Konsentrasi (ppm)"),
+        y=alt.Y("Absorbansi", title="Absorbansi")
+    )
+    fit = alt.Chart(line).mark_line(color="red", strokeDash=[4, 4]).encode(x="Konsentrasi", y="Absorbansi")
+    return (points + fit).properties(
+        title=alt.TitleParams("Kurva Kalibrasi", subtitle=f"y = {a:.3f}x + {b:.3f}"),
+        height=250
+    )
+
+
+# Rata-rata, RSD dan CV Horwitz per sampel dari array konsentrasi (ppm)
+def precision_stats(conc_values: np.ndarray):
+    avg = float(conc_values.mean())
+    rsd = float(np.std(conc_values, ddof=0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        C_decimal = conc_values / 1000000
+        cv_horwitz = 2.0 ** (1.0 - 0.5 * np.log10(C_decimal))
+    cv_horwitz[C_decimal <= 0] = np.nan
+    return avg, rsd, cv_horwitz
+
 
 st.set_page_config(page_title="Spektrofotometri Sederhana", layout="wide")
 st.title("📊 Analisis Spektrofotometri - Beer's Law")
@@ -22,17 +63,15 @@ edited_data = st.data_editor(
     use_container_width=True
 )
 
-# Parsing angka standar
-std_data = []
-for i in range(len(edited_data)):
-    try:
-        conc = float(edited_data.iloc[i]["Konsentrasi (ppm)"])
-        absb = float(edited_data.iloc[i]["Absorbansi"])
-        std_data.append((conc, absb))
-    except:
-        pass
-
-df = pd.DataFrame(std_data, columns=["Konsentrasi", "Absorbansi"])
+# Parsing angka standar, dilewati jika isi tabel standar tidak berubah (mis. hanya sampel yang diedit)
+raw_key = hash(tuple(map(tuple, edited_data.to_numpy().tolist())))
+if st.session_state.get("std_key") != raw_key:
+    conc = pd.to_numeric(edited_data["Konsentrasi (ppm)"], errors="coerce")
+    absb = pd.to_numeric(edited_data["Absorbansi"], errors="coerce")
+    st.session_state["std_df"] = pd.DataFrame({"Konsentrasi": conc, "Absorbansi": absb}).dropna().reset_index(drop=True)
+    st.session_state["std_key"] = raw_key
+    st.session_state.pop("fit", None)
+df = st.session_state["std_df"]
 
 if df.shape[0] < num_std:
     st.warning("Isi semua nilai terlebih dahulu dengan format angka yang benar.")
@@ -43,31 +82,17 @@ if df["Konsentrasi"].nunique() < 2:
     st.stop()
 
 # Regresi linier
-a, b, r_value, _, _ = linregress(df["Konsentrasi"], df["Absorbansi"])
+if "fit" not in st.session_state:
+    st.session_state["fit"] = _fit(tuple(df["Konsentrasi"]), tuple(df["Absorbansi"]))
+a, b, r_value = st.session_state["fit"]
 r_squared = r_value**2
 
 if abs(a) < 1e-6:
     st.error("Slope terlalu kecil. Data mungkin tidak cukup bervariasi atau tidak linier.")
     st.stop()
 
-# Plot kurva super kecil dengan legend diperkecil
-fig, ax = plt.subplots(figsize=(1.3, 1.3))  # ukuran kecil
-x_fit = np.linspace(0, df["Konsentrasi"].max() * 1.1, 100)
-y_fit = a * x_fit + b
-
-ax.scatter(df["Konsentrasi"], df["Absorbansi"], s=8, color="blue", edgecolor="black", linewidth=0.2, label="Data Standar")
-ax.plot(x_fit, y_fit, color="red", linestyle="--", linewidth=0.6, label=f"y = {a:.3f}x + {b:.3f}")
-
-ax.set_xlabel("Konsentrasi (ppm)", fontsize=6)
-ax.set_ylabel("Absorbansi", fontsize=6)
-ax.set_title("Kurva Kalibrasi", fontsize=7)
-ax.tick_params(axis='both', labelsize=5)
-ax.grid(True, linewidth=0.25, alpha=0.5)
-
-# Legend kecil supaya tidak menutupi kurva
-ax.legend(fontsize=4, markerscale=0.6, loc="best")
-
-st.pyplot(fig)
+# Plot kurva kalibrasi (dirender Vega-Lite di browser)
+st.altair_chart(build_calibration_chart(df, a, b), use_container_width=True)
 
 # Parameter regresi + interpretasi singkat
 st.markdown("### 📌 Parameter Regresi & Interpretasi")
@@ -84,54 +109,51 @@ num_samples = st.number_input("Jumlah sampel", min_value=1, max_value=10, value=
 # Tabel input hanya absorbansi
 sample_data = pd.DataFrame({"Absorbansi": ["" for _ in range(num_samples)]})
 
-edited_samples = st.data_editor(sample_data, num_rows="dynamic", key="samples_editor", use_container_width=True)
+# Form menahan rerun sampai tombol ditekan, bukan setiap kali sel diedit
+with st.form("samples"):
+    edited_samples = st.data_editor(sample_data, num_rows="dynamic", key="samples_editor", use_container_width=True)
+    st.form_submit_button("Hitung")
 
-# Hitung otomatis konsentrasi
+# Hitung konsentrasi
 df_samples = edited_samples.copy()
-conc_values = []
-abs_values = []
-for i in range(len(df_samples)):
-    try:
-        abs_val = float(df_samples.loc[i, "Absorbansi"])
-        conc_val = (abs_val - b) / a if a != 0 else 0
-        conc_val = max(conc_val, 0)
-        df_samples.loc[i, "Konsentrasi (ppm)"] = round(conc_val, 3)
-        abs_values.append(abs_val)
-        conc_values.append(conc_val)
-    except:
-        df_samples.loc[i, "Konsentrasi (ppm)"] = ""
+abs_arr = pd.to_numeric(df_samples["Absorbansi"], errors="coerce").to_numpy(dtype=np.float64)
+mask = ~np.isnan(abs_arr)
+conc_arr = np.where(mask, np.clip((abs_arr - b) / a, 0, None), np.nan)
+df_samples["Konsentrasi (ppm)"] = conc_arr
+conc_values = conc_arr[mask]
+abs_values = abs_arr[mask]
 
 st.markdown("#### 📋 Tabel Hasil Sampel")
-st.table(df_samples)
+st.dataframe(
+    df_samples,
+    use_container_width=True,
+    hide_index=True,
+    column_config={"Konsentrasi (ppm)": st.column_config.NumberColumn(format="%.3f")}
+)
 
 # Hitung RSD dan Horwitz jika data valid
-if conc_values:
-    avg_conc_values = np.mean(conc_values)
-    selisih_values = [(x - avg_conc_values)**2 for x in conc_values]
-    rsd = math.sqrt(np.mean(selisih_values))
+if conc_values.size:
+    avg_conc_values, rsd, cv_horwitz = precision_stats(conc_values)
     st.markdown(f"📌 Rata-rata: {avg_conc_values:.2f}")
     st.markdown(f"📌 %RSD = {rsd:.2f}")
 
     st.markdown("#### 📉 Evaluasi Presisi (CV Horwitz)")
-    horwitz_results = []
-    horwitz_values = []
-
-    for idx, conc in enumerate(conc_values):
-        C_decimal = conc / 1000000
-        if C_decimal > 0:
-            cv_horwitz = 2 ** (1 - 0.5 * np.log10(C_decimal))
-            horwitz_values.append(cv_horwitz)
-        else:
-            cv_horwitz = np.nan
-        horwitz_results.append({
-            "Sampel": f"S{idx+1}",
-            "Konsentrasi (ppm)": f"{conc:.3f}",
-            "CV Horwitz (%)": f"{cv_horwitz:.2f}" if not np.isnan(cv_horwitz) else "NaN"
-        })
-
-    st.table(pd.DataFrame(horwitz_results))
-
-    horwitz_values_clean = [v for v in horwitz_values if not np.isnan(v)]
-    if horwitz_values_clean:
-        avg_cv_horwitz = np.mean(horwitz_values_clean)
+    horwitz_results = pd.DataFrame({
+        "Sampel": np.char.add("S", (np.arange(conc_values.size) + 1).astype(str)),
+        "Konsentrasi (ppm)": conc_values,
+        "CV Horwitz (%)": cv_horwitz
+    })
+    # Format angka hanya saat ditampilkan, data tetap numerik
+    st.dataframe(
+        horwitz_results,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "Konsentrasi (ppm)": st.column_config.NumberColumn(format="%.3f"),
+            "CV Horwitz (%)": st.column_config.NumberColumn(format="%.2f")
+        }
+    )
+
+    if not np.isnan(cv_horwitz).all():
+        avg_cv_horwitz = np.nanmean(cv_horwitz)
         st.markdown(f"📌 Rata-rata CV Horwitz: {avg_cv_horwitz:.2f}%")